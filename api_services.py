@@ -1,93 +1,200 @@
 #!/usr/bin/env python3
 import os
-import json
+import re
+import orjson
+import random
+import asyncio
 import base64
 import logging
-import requests
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI
 from pathlib import Path
 
+import functools
+
+from rate_limiter import TokenBucket
+
 # Use logger from centralized config
 from log_config import setup_colored_logging
 logger = logging.getLogger('api_services')
 
+# Matches a whole response wrapped in markdown code fences, capturing the
+# body; one compiled scan instead of chained startswith/replace passes
+_FENCE_RE = re.compile(r'^\s*`{1,3}(?:json)?\s*\n?(.*?)\n?\s*`{1,3}\s*$', re.DOTALL)
+
+@functools.lru_cache(maxsize=None)
+def _read_prompt_file(file_path):
+    """Read a prompt template from disk once per process"""
+    try:
+        with open(file_path, "r") as f:
+            return f.read().strip()
+    except Exception as e:
+        logger.error(f"Failed to load prompt from {file_path}: {e}")
+        return ""
+
 class APIServices:
     """
     Handles all API interactions (OpenAI, RapidAPI, etc.)
     """
+    # Transient failures worth retrying instead of failing the whole slide
+    RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+    RETRY_ATTEMPTS = 4
+
+    # Structured-output schema so one summary call also yields the final,
+    # ready-to-send DALL-E prompt per slide (no client-side re-templating)
+    SUMMARY_RESPONSE_FORMAT = {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "article_slides",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "summary": {"type": "string"},
+                    "slides": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "title": {"type": "string"},
+                                "voiceOver": {"type": "string"},
+                                "imgPrompt": {"type": "string"},
+                                "fullImagePrompt": {"type": "string"}
+                            },
+                            "required": ["title", "voiceOver", "imgPrompt", "fullImagePrompt"],
+                            "additionalProperties": False
+                        }
+                    }
+                },
+                "required": ["summary", "slides"],
+                "additionalProperties": False
+            }
+        }
+    }
+
     def __init__(self, openai_api_key, rapidapi_key):
         self.openai_api_key = openai_api_key
         self.rapidapi_key = rapidapi_key
-        self.openai_client = OpenAI(api_key=openai_api_key)
-        self.session = requests.Session()
-        
+        self.openai_client = AsyncOpenAI(api_key=openai_api_key)
+        # Shared async client: HTTP/2 + keep-alive pool so all slides reuse
+        # the same connections instead of paying TCP/TLS setup per request
+        self.client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+            timeout=120.0  # DALL-E generations can be slow; keep-alive makes long timeouts cheap
+        )
+
         # API URLs
         self.REALTIME_NEWS_URL = "https://real-time-news-data.p.rapidapi.com/topic-headlines"
         self.EXTRACT_URL = "https://news-article-data-extract-and-summarization1.p.rapidapi.com/extract"
-        
+
+        # Per-host token buckets sized to provider caps (TTS is generous,
+        # DALL-E 3 is ~5 images/min on the standard tier)
+        self.tts_limiter = TokenBucket(50, per=60, name="openai-tts")
+        self.image_limiter = TokenBucket(5, per=60, name="openai-images")
+        self.rapidapi_limiter = TokenBucket(30, per=60, name="rapidapi")
+
         # Load prompt templates
         self.prompt_dir = Path("prompts")
         self.summary_prompt = self._load_prompt("summary_prompt.txt")
         self.image_subtitle_prompt = self._load_prompt("image_subtitle_prompt.txt")
-    
+
+    async def aclose(self):
+        """Close the underlying HTTP connection pool"""
+        await self.client.aclose()
+
+    def _retry_delay(self, exc, attempt):
+        """Seconds to wait before retrying, or None if exc isn't transient"""
+        if isinstance(exc, httpx.HTTPStatusError):
+            if exc.response.status_code not in self.RETRYABLE_STATUS:
+                return None
+            # Honour the provider's own pacing hint when present
+            retry_after = exc.response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return float(retry_after)
+                except ValueError:
+                    pass
+        elif not isinstance(exc, httpx.TransportError):
+            return None
+        return min(2 ** (attempt - 1) + random.uniform(0, 1), 30)
+
+    async def _post_with_retry(self, url, limiter=None, **kwargs):
+        """POST with exponential backoff and jitter on transient failures
+
+        Retrying here means a 429/5xx costs one slide a short wait instead
+        of re-running the whole article pipeline.
+        """
+        for attempt in range(1, self.RETRY_ATTEMPTS + 1):
+            if limiter is not None:
+                await limiter.acquire()
+            try:
+                resp = await self.client.post(url, **kwargs)
+                resp.raise_for_status()
+                return resp
+            except httpx.HTTPError as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None or attempt == self.RETRY_ATTEMPTS:
+                    raise
+                logger.warning(f"Transient error from {url} "
+                               f"(attempt {attempt}/{self.RETRY_ATTEMPTS}), retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
     def _load_prompt(self, filename):
-        """Load a prompt template from file"""
-        try:
-            file_path = self.prompt_dir / filename
-            with open(file_path, "r") as f:
-                return f.read().strip()
-        except Exception as e:
-            logger.error(f"Failed to load prompt from {filename}: {e}")
-            return ""
-    
-    def fetch_headlines(self, country="US", lang="en", limit=15, topic="BUSINESS"):
+        """Load a prompt template, cached process-wide so repeated
+        APIServices constructions don't re-read the same files"""
+        return _read_prompt_file(str(self.prompt_dir / filename))
+
+    async def fetch_headlines(self, country="US", lang="en", limit=15, topic="BUSINESS"):
         """Fetches topic headlines using RapidAPI"""
         logger.info(f"Fetching {topic} headlines for country={country}, lang={lang}")
-        
+
         params = {"topic": topic, "limit": str(limit), "country": country, "lang": lang}
         headers = {
             "x-rapidapi-host": "real-time-news-data.p.rapidapi.com",
             "x-rapidapi-key": self.rapidapi_key
         }
-        
+
         try:
-            resp = self.session.get(self.REALTIME_NEWS_URL, params=params, headers=headers)
+            await self.rapidapi_limiter.acquire()
+            resp = await self.client.get(self.REALTIME_NEWS_URL, params=params, headers=headers)
             resp.raise_for_status()
             result = resp.json().get("data", [])
             logger.info(f"Retrieved {len(result)} headlines")
             return result
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Failed to fetch headlines: {e}")
             return []
-    
-    def extract_article(self, url):
+
+    async def extract_article(self, url):
         """Extracts article content using RapidAPI"""
         logger.info(f"Extracting article from URL: {url}")
-        
+
         headers = {
             "x-rapidapi-host": "news-article-data-extract-and-summarization1.p.rapidapi.com",
             "x-rapidapi-key": self.rapidapi_key,
             "Content-Type": "application/json"
         }
         payload = {"url": url}
-        
+
         try:
-            resp = self.session.post(self.EXTRACT_URL, json=payload, headers=headers)
+            await self.rapidapi_limiter.acquire()
+            resp = await self.client.post(self.EXTRACT_URL, json=payload, headers=headers)
             resp.raise_for_status()
             result = resp.json()
             logger.info("Article extraction completed successfully")
             return result
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Failed to extract article: {e}")
             return None
-    
-    def generate_summary(self, article):
+
+    async def generate_summary(self, article):
         """Generates a summary of the article using OpenAI"""
         logger.info("Generating summary with OpenAI")
-        
+
         # Use the loaded prompt template from file
         prompt = self.summary_prompt
-        
+
         # Add article data to the prompt
         article_data = f"""
 ---------------
@@ -101,27 +208,35 @@ class APIServices:
 {','.join(article.get('keywords',[]))}
 {article.get('summary','')}
 """
-        
+
+        # Ask for the final DALL-E prompt per slide in the same call, so we
+        # don't re-template prompts client-side afterwards
+        full_image_prompt_instruction = (
+            'For each slide also include "fullImagePrompt": the complete, final image '
+            "generation prompt, formed by that slide's imgPrompt followed by: "
+            f'"{self.image_subtitle_prompt}" with {{title}} replaced by the slide title.'
+        )
+
         # Combine the prompt template with article data
-        full_prompt = f"{prompt}\n\n{article_data}"
+        full_prompt = f"{prompt}\n\n{full_image_prompt_instruction}\n\n{article_data}"
         try:
-            resp = self.openai_client.chat.completions.create(
+            resp = await self.openai_client.chat.completions.create(
                 model="gpt-4.1",
-                messages=[{"role": "user", "content": full_prompt}]
+                messages=[{"role": "user", "content": full_prompt}],
+                response_format=self.SUMMARY_RESPONSE_FORMAT
             )
             content = resp.choices[0].message.content
             # Parse the JSON response
             try:
                 # Clean response if needed (remove markdown code blocks etc.)
-                if content.startswith("```json"):
-                    content = content.replace("```json", "").replace("```", "")
-                elif content.startswith("`"):
-                    content = content.strip("`")
-                
-                result = json.loads(content)
+                fenced = _FENCE_RE.match(content)
+                if fenced:
+                    content = fenced.group(1)
+
+                result = orjson.loads(content)
                 logger.info(f"Summary generation complete with {len(result.get('slides', []))} slides")
                 return result
-            except json.JSONDecodeError as e:
+            except orjson.JSONDecodeError as e:
                 logger.error(f"Failed to parse OpenAI response as JSON: {e}")
                 logger.error(f"Raw response: {content[:500]}...")
                 return None
@@ -130,16 +245,18 @@ class APIServices:
             if 'content' in locals():
                 logger.debug(f"Raw OpenAI response: {content[:500]}...")
             return None
-    
-    def generate_tts(self, text):
-        """Generates text-to-speech using OpenAI API"""
+
+    async def generate_tts(self, text, out_path):
+        """Generates text-to-speech using OpenAI API, streaming the MP3
+        straight into out_path and returning its Path (consumers hardlink
+        or copy from the cache file rather than holding the bytes)"""
         if not text or len(text.strip()) == 0:
             error_msg = "Empty text provided for TTS generation"
             logger.error(error_msg)
             raise ValueError(error_msg)
-            
+
         logger.info(f"Generating TTS for text: '{text[:50]}...'")
-        
+
         headers = {
             "Authorization": f"Bearer {self.openai_api_key}",
             "Content-Type": "application/json"
@@ -152,46 +269,69 @@ class APIServices:
             "response_format": "mp3",
             "speed": 1.2
         }
-        
-        try:
-            resp = self.session.post(
-                "https://api.openai.com/v1/audio/speech", 
-                json=payload, 
-                headers=headers
-            )
-            resp.raise_for_status()
-            logger.info(f"TTS generation complete, received {len(resp.content)} bytes")
-            return resp.content  # raw MP3 bytes
-        except requests.exceptions.RequestException as e:
-            # Try to get the error details
-            error_msg = f"Failed to generate TTS: {e}"
+
+        # Stream chunks to disk as they arrive instead of buffering the
+        # whole MP3 in memory and copying it again for the cache
+        tmp_path = f"{out_path}.tmp"
+        for attempt in range(1, self.RETRY_ATTEMPTS + 1):
             try:
-                error_details = resp.json()
-                error_msg += f" - Details: {error_details}"
-                logger.error(error_msg)
-            except Exception:
-                logger.error(error_msg)
-                logger.error("Could not parse error response")
-            # Re-raise a custom exception with details
-            raise RuntimeError(error_msg)
-    
-    def generate_image(self, img_prompt, title):
-        """Generates an image using OpenAI's DALL-E API"""
-        if not img_prompt or len(img_prompt.strip()) == 0:
+                await self.tts_limiter.acquire()
+                async with self.client.stream(
+                    "POST",
+                    "https://api.openai.com/v1/audio/speech",
+                    json=payload,
+                    headers=headers
+                ) as resp:
+                    resp.raise_for_status()
+                    with open(tmp_path, "wb") as out:
+                        async for chunk in resp.aiter_bytes(64 * 1024):
+                            out.write(chunk)
+                os.replace(tmp_path, out_path)
+                logger.info(f"TTS generation complete, streamed {os.path.getsize(out_path)} bytes to cache")
+                return Path(out_path)
+            except httpx.HTTPError as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is not None and attempt < self.RETRY_ATTEMPTS:
+                    logger.warning(f"Transient TTS error (attempt {attempt}/{self.RETRY_ATTEMPTS}), "
+                                   f"retrying in {delay:.1f}s: {e}")
+                    await asyncio.sleep(delay)
+                    continue
+                # Try to get the error details
+                error_msg = f"Failed to generate TTS: {e}"
+                try:
+                    await resp.aread()
+                    error_details = resp.json()
+                    error_msg += f" - Details: {error_details}"
+                    logger.error(error_msg)
+                except Exception:
+                    logger.error(error_msg)
+                    logger.error("Could not parse error response")
+                # Drop any partially streamed file
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                # Re-raise a custom exception with details
+                raise RuntimeError(error_msg)
+
+    async def generate_image(self, full_prompt):
+        """Generates an image using OpenAI's DALL-E API
+
+        Expects the complete prompt (subtitle instruction included), as
+        emitted by generate_summary's fullImagePrompt field.
+        """
+        if not full_prompt or len(full_prompt.strip()) == 0:
             error_msg = "Empty image prompt provided"
             logger.error(error_msg)
             raise ValueError(error_msg)
-            
-        logger.info(f"Generating image for prompt: '{img_prompt[:300]}...'")
-        
+
+        logger.info(f"Generating image for prompt: '{full_prompt[:300]}...'")
+
         headers = {
             "Authorization": f"Bearer {self.openai_api_key}",
             "Content-Type": "application/json"
         }
-        
-        # Use the loaded image subtitle prompt template
-        full_prompt = f"{img_prompt}. {self.image_subtitle_prompt.format(title=title)}"
-        
+
         # Make sure we use the DALL-E 3 model for better results
         payload = {
             "model": "dall-e-3",
@@ -201,22 +341,24 @@ class APIServices:
             "response_format": "b64_json",
             "quality": "standard"
         }
-        
+
         try:
-            resp = self.session.post(
-                "https://api.openai.com/v1/images/generations", 
-                json=payload, 
-                headers=headers
+            resp = await self._post_with_retry(
+                "https://api.openai.com/v1/images/generations",
+                json=payload,
+                headers=headers,
+                limiter=self.image_limiter
             )
-            resp.raise_for_status()
             result = resp.json()
             logger.info("Image generation complete")
-            return result.get('data', [{}])[0].get('b64_json')
-        except requests.exceptions.RequestException as e:
+            # Decode once here so the image travels as raw bytes end-to-end
+            image_b64 = result.get('data', [{}])[0].get('b64_json')
+            return base64.b64decode(image_b64) if image_b64 else None
+        except httpx.HTTPError as e:
             # Try to get the error details
             error_msg = f"Failed to generate image: {e}"
             try:
-                error_details = resp.json()
+                error_details = e.response.json()
                 error_msg += f" - Details: {error_details}"
                 logger.error(error_msg)
                 # Also log the prompt that caused the error
@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 import os
-import json
+import orjson
 import logging
-import hashlib
-import base64
+import blake3
+import functools
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 # Use logger from centralized config
 from log_config import setup_colored_logging
@@ -27,60 +28,139 @@ class CacheManager:
         
         for directory in [self.tts_dir, self.image_dir, self.article_dir, self.summary_dir, self.headlines_dir]:
             os.makedirs(directory, exist_ok=True)
-            
+
+        # Background writer so cache persistence stays off the generation
+        # critical path (threads are joined at interpreter exit, so queued
+        # writes always complete)
+        self._io_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-io")
+
+        # In-process memo of JSON cache entries so repeated lookups within
+        # one run skip the disk stat+read entirely; save_* keeps it coherent
+        self._mem = {}
+        self._mem_max = 128
+
+        # Pending background writes by path, so deletes can wait for (or
+        # cancel) an in-flight write instead of racing it
+        self._pending_writes = {}
+
+        # Shard directories already created this run
+        self._created_shards = set()
+
         logger.info(f"Cache initialized at {os.path.abspath(cache_dir)}")
+
+    def _write_atomic(self, cache_path, data):
+        """Write bytes to a temp file, then os.replace into place (atomic)"""
+        tmp_path = f"{cache_path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            logger.error(f"Failed to write cache file {cache_path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _submit_write(self, cache_path, data):
+        """Queue an atomic write on the background I/O executor"""
+        future = self._io_executor.submit(self._write_atomic, cache_path, data)
+        self._pending_writes[cache_path] = future
+        future.add_done_callback(lambda _: self._pending_writes.pop(cache_path, None))
+
+    def _settle_write(self, cache_path):
+        """Cancel or wait out any in-flight write for this path"""
+        future = self._pending_writes.pop(cache_path, None)
+        if future is not None and not future.cancel():
+            future.result()
         
+    def _cache_path(self, base_dir, content_hash, ext):
+        """Build a sharded cache path, bucketing by the first 2 hex chars
+
+        Keeps each directory at most 256 buckets deep so lookups stay O(1)
+        even when the cache grows to tens of thousands of entries. Paths
+        are plain f-string concatenation (os.path.join re-checks types and
+        separators on every call) and shard creation is remembered so each
+        bucket costs one makedirs per run, not one per probe.
+        """
+        shard_dir = f"{base_dir}{os.sep}{content_hash[:2]}"
+        if shard_dir not in self._created_shards:
+            os.makedirs(shard_dir, exist_ok=True)
+            self._created_shards.add(shard_dir)
+        return f"{shard_dir}{os.sep}{content_hash[2:]}{ext}"
+
+    def _path_if_exists(self, cache_path):
+        """Return the cache file's Path (one stat), or None if missing.
+
+        Binary assets are handed around as paths so consumers can hardlink
+        the cache file into place instead of copying its bytes through
+        Python at all.
+        """
+        return Path(cache_path) if os.path.exists(cache_path) else None
+
+    def _load_json_if_exists(self, cache_path):
+        """Read and parse a JSON cache file, or None if it doesn't exist"""
+        try:
+            with open(cache_path, "rb") as f:
+                return orjson.loads(f.read())
+        except FileNotFoundError:
+            return None
+
+    def _mem_put(self, cache_path, data):
+        """Remember a JSON cache entry in memory, evicting the oldest"""
+        if len(self._mem) >= self._mem_max:
+            self._mem.pop(next(iter(self._mem)))
+        self._mem[cache_path] = data
+
+    @functools.lru_cache(maxsize=1024)
     def _get_hash(self, content):
         """Create a hash from content for use as a cache key"""
+        # BLAKE3 (SIMD-accelerated) - cache keys don't need cryptographic
+        # strength, so 16 bytes of digest is plenty
         if isinstance(content, str):
             content = content.encode('utf-8')
-        return hashlib.md5(content).hexdigest()
+        return blake3.blake3(content).hexdigest(length=16)
         
     def get_tts(self, text):
         """Check if TTS for text exists in cache"""
         content_hash = self._get_hash(text)
-        cache_path = os.path.join(self.tts_dir, f"{content_hash}.mp3")
+        cache_path = self._cache_path(self.tts_dir, content_hash, ".mp3")
         
-        if os.path.exists(cache_path):
+        audio = self._path_if_exists(cache_path)
+        if audio is not None:
             logger.info(f"TTS cache hit for '{text[:30]}...'")
-            with open(cache_path, "rb") as f:
-                return f.read()
-        return None
+        return audio
         
-    def save_tts(self, text, audio_content):
-        """Save TTS audio to cache"""
+    def tts_cache_path(self, text):
+        """Return the on-disk cache path for this text's TTS audio, so the
+        API layer can stream the response straight into the cache"""
         content_hash = self._get_hash(text)
-        cache_path = os.path.join(self.tts_dir, f"{content_hash}.mp3")
-        
-        with open(cache_path, "wb") as f:
-            f.write(audio_content)
-        logger.info(f"Saved TTS to cache for '{text[:30]}...'")
+        return self._cache_path(self.tts_dir, content_hash, ".mp3")
         
     def get_image(self, prompt):
-        """Check if image for prompt exists in cache"""
+        """Check if image for prompt exists in cache, returning its Path"""
         content_hash = self._get_hash(prompt)
-        cache_path = os.path.join(self.image_dir, f"{content_hash}.b64")
-        
-        if os.path.exists(cache_path):
+        cache_path = self._cache_path(self.image_dir, content_hash, ".png")
+
+        image = self._path_if_exists(cache_path)
+        if image is not None:
             logger.info(f"Image cache hit for prompt '{prompt[:30]}...'")
-            with open(cache_path, "r") as f:
-                return f.read()
-        return None
-        
-    def save_image(self, prompt, image_b64):
-        """Save image base64 to cache"""
+        return image
+
+    def save_image(self, prompt, image_bytes):
+        """Save raw image bytes to cache (decoded once at the API boundary)"""
         content_hash = self._get_hash(prompt)
-        cache_path = os.path.join(self.image_dir, f"{content_hash}.b64")
-        
-        with open(cache_path, "w") as f:
-            f.write(image_b64)
+        cache_path = self._cache_path(self.image_dir, content_hash, ".png")
+
+        self._submit_write(cache_path, image_bytes)
         logger.info(f"Saved image to cache for prompt '{prompt[:30]}...'")
-        
+
     def delete_image(self, prompt):
         """Delete image from cache if generation fails"""
         content_hash = self._get_hash(prompt)
-        cache_path = os.path.join(self.image_dir, f"{content_hash}.b64")
-        
+        cache_path = self._cache_path(self.image_dir, content_hash, ".png")
+        self._settle_write(cache_path)
+
         if os.path.exists(cache_path):
             try:
                 os.remove(cache_path)
@@ -93,21 +173,24 @@ class CacheManager:
     def get_article(self, url):
         """Check if article extraction exists in cache"""
         content_hash = self._get_hash(url)
-        cache_path = os.path.join(self.article_dir, f"{content_hash}.json")
-        
-        if os.path.exists(cache_path):
+        cache_path = self._cache_path(self.article_dir, content_hash, ".json")
+
+        if cache_path in self._mem:
+            return self._mem[cache_path]
+
+        article_data = self._load_json_if_exists(cache_path)
+        if article_data is not None:
             logger.info(f"Article cache hit for URL '{url}'")
-            with open(cache_path, "r") as f:
-                return json.load(f)
-        return None
+            self._mem_put(cache_path, article_data)
+        return article_data
         
     def save_article(self, url, article_data):
         """Save article data to cache"""
         content_hash = self._get_hash(url)
-        cache_path = os.path.join(self.article_dir, f"{content_hash}.json")
+        cache_path = self._cache_path(self.article_dir, content_hash, ".json")
         
-        with open(cache_path, "w") as f:
-            json.dump(article_data, f)
+        self._mem_put(cache_path, article_data)
+        self._submit_write(cache_path, orjson.dumps(article_data))
         logger.info(f"Saved article to cache for URL '{url}'")
         
     def get_summary(self, article_data):
@@ -118,13 +201,16 @@ class CacheManager:
             return None
             
         content_hash = self._get_hash(url)
-        cache_path = os.path.join(self.summary_dir, f"{content_hash}.json")
-        
-        if os.path.exists(cache_path):
+        cache_path = self._cache_path(self.summary_dir, content_hash, ".json")
+
+        if cache_path in self._mem:
+            return self._mem[cache_path]
+
+        summary_data = self._load_json_if_exists(cache_path)
+        if summary_data is not None:
             logger.info(f"Summary cache hit for article '{url}'")
-            with open(cache_path, "r") as f:
-                return json.load(f)
-        return None
+            self._mem_put(cache_path, summary_data)
+        return summary_data
         
     def save_summary(self, article_data, summary_data):
         """Save summary data to cache"""
@@ -134,10 +220,10 @@ class CacheManager:
             return
             
         content_hash = self._get_hash(url)
-        cache_path = os.path.join(self.summary_dir, f"{content_hash}.json")
+        cache_path = self._cache_path(self.summary_dir, content_hash, ".json")
         
-        with open(cache_path, "w") as f:
-            json.dump(summary_data, f)
+        self._mem_put(cache_path, summary_data)
+        self._submit_write(cache_path, orjson.dumps(summary_data))
         logger.info(f"Saved summary to cache for article '{url}'")
         
     def delete_summary(self, article_data):
@@ -148,8 +234,10 @@ class CacheManager:
             return False
             
         content_hash = self._get_hash(url)
-        cache_path = os.path.join(self.summary_dir, f"{content_hash}.json")
-        
+        cache_path = self._cache_path(self.summary_dir, content_hash, ".json")
+        self._mem.pop(cache_path, None)
+        self._settle_write(cache_path)
+
         if os.path.exists(cache_path):
             try:
                 os.remove(cache_path)
@@ -164,20 +252,23 @@ class CacheManager:
         # Create a unique key for the headlines request based on parameters
         key = f"{topic}-{country}-{lang}-{limit}"
         content_hash = self._get_hash(key)
-        cache_path = os.path.join(self.headlines_dir, f"{content_hash}.json")
-        
-        if os.path.exists(cache_path):
+        cache_path = self._cache_path(self.headlines_dir, content_hash, ".json")
+
+        if cache_path in self._mem:
+            return self._mem[cache_path]
+
+        headlines_data = self._load_json_if_exists(cache_path)
+        if headlines_data is not None:
             logger.info(f"Headlines cache hit for topic '{topic}', country '{country}', language '{lang}', limit {limit}")
-            with open(cache_path, "r") as f:
-                return json.load(f)
-        return None
+            self._mem_put(cache_path, headlines_data)
+        return headlines_data
         
     def save_headlines(self, country, lang, limit, headlines_data, topic="BUSINESS"):
         """Save headlines data to cache"""
         key = f"{topic}-{country}-{lang}-{limit}"
         content_hash = self._get_hash(key)
-        cache_path = os.path.join(self.headlines_dir, f"{content_hash}.json")
+        cache_path = self._cache_path(self.headlines_dir, content_hash, ".json")
         
-        with open(cache_path, "w") as f:
-            json.dump(headlines_data, f)
+        self._mem_put(cache_path, headlines_data)
+        self._submit_write(cache_path, orjson.dumps(headlines_data))
         logger.info(f"Saved headlines to cache for topic '{topic}', country '{country}', language '{lang}', limit {limit}")
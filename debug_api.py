@@ -12,6 +12,11 @@ logger = logging.getLogger('api_debug')
 load_dotenv()
 RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY")
 
+# One pooled session so repeated checks (e.g. health-check loops) reuse
+# the TCP+TLS connection instead of handshaking every call
+_SESSION = requests.Session()
+_SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
 def test_rapidapi_key():
     """Tests if the RapidAPI key is valid"""
     if not RAPIDAPI_KEY:
@@ -39,7 +44,7 @@ def test_rapidapi_key():
         logger.info(f"Headers: {headers}")
         logger.info(f"Params: {params}")
         
-        response = requests.get(url, headers=headers, params=params)
+        response = _SESSION.get(url, headers=headers, params=params, timeout=10)
         
         # Log response details
         logger.info(f"Response status code: {response.status_code}")
@@ -67,26 +72,15 @@ def test_rapidapi_key():
         return False
 
 def check_env_file():
-    """Checks if .env file has correct format for API keys"""
-    try:
-        with open('.env', 'r') as f:
-            content = f.read()
-            logger.info("Found .env file")
-            
-            # Check if API keys are present with proper format
-            if 'RAPIDAPI_KEY=' not in content:
-                logger.warning("RAPIDAPI_KEY not found in .env file with correct format")
-                logger.info("Expected format: RAPIDAPI_KEY=your_api_key_here (no spaces or quotes)")
-            else:
-                logger.info("RAPIDAPI_KEY entry found in .env file")
-                
-            if 'OPENAI_API_KEY=' not in content:
-                logger.warning("OPENAI_API_KEY not found in .env file with correct format")
-            else:
-                logger.info("OPENAI_API_KEY entry found in .env file")
-    except FileNotFoundError:
-        logger.error(".env file not found")
-        logger.info("Create a .env file with RAPIDAPI_KEY=your_key and OPENAI_API_KEY=your_key")
+    """Checks if the API keys made it into the environment"""
+    # load_dotenv() already merged .env into os.environ, so checking the
+    # environment covers both the file and keys exported from the shell
+    for key in ('RAPIDAPI_KEY', 'OPENAI_API_KEY'):
+        if os.environ.get(key):
+            logger.info(f"{key} is set")
+        else:
+            logger.warning(f"{key} is not set")
+            logger.info(f"Add {key}=your_key_here to .env (no spaces or quotes) or export it")
 
 def suggest_fixes():
     """Suggests potential fixes for API issues"""
@@ -4,21 +4,10 @@ import os
 import platform
 import multiprocessing
 import shutil
-
-# Import moviepy components
-from moviepy import (
-	ImageClip,
-	AudioFileClip,
-	CompositeVideoClip,
-	ColorClip,
-	vfx,
-	CompositeAudioClip,
-)
-
-# Ensure ffmpeg is available
-import moviepy.config as conf
-conf.FFMPEG_BINARY = 'ffmpeg'  # Set ffmpeg path directly
-
+import functools
+import subprocess
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 
 if shutil.which("ffmpeg") is None:
 	sys.stderr.write("Error: FFmpeg not found. Please install FFmpeg.\n")
@@ -47,6 +36,11 @@ PREVIEW_RESOLUTION = (360, 640)  # lower resolution for preview
 RESOLUTION = PREVIEW_RESOLUTION if PREVIEW else FULL_RESOLUTION
 
 FPS = 30
+# Stills are fed into the graph at this low rate; the color base drives
+# overlay timing at full FPS and repeats the last secondary frame, so
+# scale/format run ~STILL_FPS times per second per slide instead of FPS
+# while the slide-in animation stays smooth
+STILL_FPS = 2
 TRANSITION_DURATION = 0.15  # seconds
 
 def load_slides():
@@ -58,168 +52,200 @@ def load_slides():
 		sys.exit(1)
 	return slides
 
-def load_image(image_path, resolution):
+@functools.lru_cache(maxsize=1)
+def nvenc_available():
 	"""
-	Load image and resize to fit the height of the resolution.
+	Check once per process whether ffmpeg was built with the NVENC
+	h264 encoder (i.e. an NVIDIA GPU can take the encode).
 	"""
-	if not os.path.isfile(image_path):
-		sys.stderr.write(f"Error: Image file not found: {image_path}\n")
-		sys.exit(1)
-
 	try:
-		# Load image and resize to fit the height while maintaining aspect ratio
-		img = ImageClip(image_path)
-		resized_img = img.with_effects([vfx.Resize(height=resolution[1])])
-		return resized_img
-	except Exception as e:
-		sys.stderr.write(f"Error processing image {image_path}: {e}\n")
-		sys.exit(1)
-
-def load_audio(audio_path):
+		result = subprocess.run(
+			["ffmpeg", "-hide_banner", "-encoders"],
+			capture_output=True, text=True
+		)
+		return "h264_nvenc" in result.stdout
+	except Exception:
+		return False
+
+def probe_audio(audio_path):
 	"""
-	Load audio file.
+	Return (duration_seconds, sample_rate_hz) for an audio file with a
+	single ffprobe call - no decoder subprocess needs to be spawned just
+	to read stream metadata.
 	"""
 	if not os.path.isfile(audio_path):
 		sys.stderr.write(f"Error: Audio file not found: {audio_path}\n")
 		sys.exit(1)
 
-	return AudioFileClip(audio_path)
+	result = subprocess.run(
+		[
+			"ffprobe", "-v", "error",
+			"-select_streams", "a:0",
+			"-show_entries", "stream=duration,sample_rate:format=duration",
+			"-of", "json",
+			audio_path,
+		],
+		capture_output=True, text=True
+	)
+	if result.returncode != 0 or not result.stdout.strip():
+		raise RuntimeError(f"ffprobe failed for {audio_path}: {result.stderr.strip()}")
+
+	probed = orjson.loads(result.stdout)
+	stream = probed["streams"][0]
+	# Some containers only report duration at the format level
+	duration = float(stream.get("duration") or probed["format"]["duration"])
+	return duration, int(stream["sample_rate"])
 
-def slide_right(clip, duration):
+def build_ffmpeg_command(slide_defs, audio_durations, start_times, total_time, output_path, resolution, audio_rate):
 	"""
-	Create a transform effect that slides from right to center.
+	Build a single ffmpeg invocation that scales, slides in and overlays
+	every slide and mixes the delayed audio tracks, all inside ffmpeg's
+	native (SIMD, multi-threaded) filter graph - no per-frame Python work.
 	"""
-	# Calculate center position
-	center_x = int(RESOLUTION[0] / 2 - clip.size[0] / 2)
-	
-	def get_frame_position(t):
-		if t < duration: 
-			# During transition: slide from right to center
-			# Start offscreen (RESOLUTION[0]) and move to center
-			progress = t / duration  # 0 to 1
-			start_x = RESOLUTION[0] 
-			x_pos = int(start_x - progress * (start_x - center_x))
-			return (x_pos, 'center')
-		else:
-			# After transition: stay at center position
-			return (center_x, 'center')
-	
-	return clip.with_position(get_frame_position)
+	width, height = resolution
+
+	cmd = ["ffmpeg", "-y", "-nostdin", "-hide_banner", "-loglevel", "error"]
 
-def assemble_video(slide_defs):
+	# Inputs: looped still image + audio per slide
+	for i, slide_def in enumerate(slide_defs):
+		display = (total_time if i == len(slide_defs) - 1 else start_times[i] + audio_durations[i]) - start_times[i]
+		cmd += ["-loop", "1", "-framerate", str(STILL_FPS), "-t", f"{display:.3f}", "-i", slide_def["image"]]
+		cmd += ["-i", slide_def["audio"]]
+
+	filters = []
+
+	# Black background spanning the whole video
+	filters.append(f"color=c=black:s={width}x{height}:r={FPS}:d={total_time:.3f}[base]")
+
+	# Scale each slide to the output height, preserving aspect ratio.
+	# libswscale interpolation: cheap bilinear is plenty for previews,
+	# lanczos for full-quality output
+	scale_flags = "lanczos" if height >= FULL_RESOLUTION[1] else "fast_bilinear"
+	for i in range(len(slide_defs)):
+		filters.append(f"[{2*i}:v]scale=-2:{height}:flags={scale_flags},setsar=1[s{i}]")
+
+	# Chain overlays; each slide after the first slides in from the right.
+	# The x expression runs inside ffmpeg's evaluator, not Python.
+	last = "base"
+	for i in range(len(slide_defs)):
+		start = start_times[i]
+		end = total_time if i == len(slide_defs) - 1 else start + audio_durations[i]
+		if i == 0:
+			x_expr = "(W-w)/2"
+		else:
+			# W-(W-w)/2 folded to (W+w)/2: fewer per-frame ops in the
+			# expression evaluator
+			x_expr = (
+				f"if(lt(t-{start:.3f},{TRANSITION_DURATION}),"
+				f"W-(t-{start:.3f})/{TRANSITION_DURATION}*(W+w)/2,"
+				f"(W-w)/2)"
+			)
+		out = "vout" if i == len(slide_defs) - 1 else f"v{i}"
+		filters.append(
+			f"[{last}][s{i}]overlay=x='{x_expr}':y=0:"
+			f"enable='between(t,{start:.3f},{end:.3f})'[{out}]"
+		)
+		last = out
+
+	# Delay each audio track to its slide's start time, then mix
+	audio_labels = []
+	for i in range(len(slide_defs)):
+		delay_ms = int(start_times[i] * 1000)
+		filters.append(f"[{2*i+1}:a]adelay={delay_ms}:all=1[a{i}]")
+		audio_labels.append(f"[a{i}]")
+	if len(slide_defs) == 1:
+		filters.append("[a0]anull[aout]")
+	else:
+		filters.append(
+			f"{''.join(audio_labels)}amix=inputs={len(slide_defs)}:duration=longest:normalize=0[aout]"
+		)
+
+	cmd += ["-filter_complex", ";".join(filters)]
+	cmd += ["-map", "[vout]", "-map", "[aout]"]
+
+	# Encoder: NVENC when ffmpeg has it (offloads motion estimation and
+	# entropy coding to the GPU ASIC), otherwise x264 on the CPU
+	if nvenc_available():
+		cmd += ["-c:v", "h264_nvenc", "-preset", "p4", "-rc", "vbr", "-cq", "23"]
+		if height < FULL_RESOLUTION[1]:
+			cmd += ["-b:v", "1M"]  # cap preview bitrate
+	else:
+		cmd += ["-c:v", "libx264", "-b:v", "5000k" if height >= 1080 else "2500k"]
+		if height < FULL_RESOLUTION[1]:
+			# Preview quality is throwaway: skip rate-distortion
+			# optimization and multi-ref prediction entirely
+			cmd += ["-preset", "ultrafast", "-tune", "zerolatency"]
+		else:
+			cmd += ["-preset", "medium"]
+
+	cmd += [
+		"-r", str(FPS),
+		"-pix_fmt", "yuv420p",
+		"-c:a", "aac",
+		# Highest probed input rate: no track loses fidelity and amix
+		# doesn't get to pick a rate that forces an extra resample
+		"-ar", str(audio_rate),
+		# Previews may grab every core; full renders keep the 75% cap
+		"-threads", "0" if height < FULL_RESOLUTION[1] else str(PROCESSES),
+		"-movflags", "+faststart",
+		"-t", f"{total_time:.3f}",
+		output_path,
+	]
+	return cmd
+
+def assemble_video(slide_defs, output_path=None, resolution=None):
 	"""
-	Builds the timeline with sliding transitions and writes output MP4.
+	Builds the timeline with sliding transitions and writes output MP4
+	via a single ffmpeg filter_complex invocation.
+
+	output_path/resolution default to the module-level configuration so
+	the CLI entry point keeps working; callers with per-request settings
+	pass them explicitly instead of mutating module globals.
 	"""
+	if output_path is None:
+		output_path = OUTPUT_FILENAME
+	if resolution is None:
+		resolution = RESOLUTION
+
 	if not slide_defs:
 		sys.stderr.write("Error: No slides to process.\n")
 		sys.exit(1)
-	
-	# Create a list to hold all clips
-	all_clips = []
-	total_time = 0
-	
-	# Calculate audio durations
-	audio_clips = []
-	audio_durations = []
+
 	for slide_def in slide_defs:
-		audio = load_audio(slide_def["audio"])
-		audio_clips.append(audio)
-		audio_durations.append(audio.duration)
-	
+		if not os.path.isfile(slide_def["image"]):
+			sys.stderr.write(f"Error: Image file not found: {slide_def['image']}\n")
+			sys.exit(1)
+
+	# Probe audio metadata in parallel - each probe is an independent
+	# ffprobe subprocess, so N slides cost one probe's wall time
+	with ThreadPoolExecutor(max_workers=min(len(slide_defs), CPU_COUNT)) as executor:
+		probes = list(executor.map(probe_audio, [s["audio"] for s in slide_defs]))
+	audio_durations = [duration for duration, _ in probes]
+	audio_rate = max(sample_rate for _, sample_rate in probes)
+
 	# Calculate start times for each slide
 	start_times = [0]  # First slide starts at 0
-	
+	total_time = audio_durations[0]
+
 	# Calculate start times for slides after the first one
 	for i in range(len(slide_defs) - 1):
 		start_time = start_times[i] + audio_durations[i] - TRANSITION_DURATION
 		start_times.append(start_time)
 		total_time = start_time + audio_durations[i+1]
-	
-	# For the last slide, add its duration to get total duration
-	if len(slide_defs) == 1:
-		total_time = audio_durations[0]
-	
-	# Create the black background that spans the entire video
-	background = ColorClip(size=RESOLUTION, color=(0, 0, 0)).with_duration(total_time)
-	all_clips.append(background)
-	
-	# Process each slide
-	for i, slide_def in enumerate(slide_defs):
-		# Load the image
-		img = load_image(slide_def["image"], RESOLUTION)
-		
-		# Set duration - until the end of its audio
-		duration = total_time - start_times[i] if i == len(slide_defs) - 1 else audio_durations[i]
-		img = img.with_duration(duration)
-		
-		# Apply transition effect for all slides except the first one
-		if i == 0:
-			# First slide is centered from the start
-			img = img.with_position("center")
-		else:
-			# Add sliding transition
-			img = slide_right(img, TRANSITION_DURATION)
-		
-		# Set the start time
-		img = img.with_start(start_times[i])
-		all_clips.append(img)
-	
-	# Create audio tracks
-	combined_audio_clips = []
-	for i, audio in enumerate(audio_clips):
-		combined_audio_clips.append(audio.with_start(start_times[i]))
-	
-	# Create the final composite with all visual elements
-	final_video = CompositeVideoClip(all_clips, size=RESOLUTION)
-	
-	# Add all audio tracks
-	final_audio = CompositeAudioClip(combined_audio_clips)
-	final_video = final_video.with_audio(final_audio)
-	
-	# Determine audio sample rate
-	srates = {audio.fps for audio in audio_clips}
-	if len(srates) > 1:
-		sys.stderr.write(f"Warning: varying audio sample rates {srates}, using {max(srates)} Hz\n")
-	audio_fps = max(srates) if srates else 44100
-	
-	# Optimize codec and parameters for Apple Silicon if detected
-	ffmpeg_params = []
-	
-	if is_apple_silicon:
-		# For Apple Silicon: Use simpler optimization approach
-		# Just use optimized settings without hardware acceleration
-		ffmpeg_params = [
-			"-movflags", "+faststart",  # Optimize for web streaming
-			"-vf", f"scale={RESOLUTION[0]}:{RESOLUTION[1]}",  # Match resolution
-			"-pix_fmt", "yuv420p"  # Standard pixel format for compatibility
-		]
-		# Use standard x264 codec but with higher quality/speed settings
-		video_codec = "libx264"
-	else:
-		# For other platforms: Use standard settings
-		ffmpeg_params = ["-movflags", "+faststart"]
-		video_codec = "libx264"
-	
-	# Write final video with optimizations
-	final_video.write_videofile(
-		OUTPUT_FILENAME,
-		fps=FPS,
-		codec=video_codec,
-		audio_codec="aac",
-		audio_fps=audio_fps,
-		temp_audiofile="temp-audio.m4a",
-		remove_temp=True,
-		threads=PROCESSES,  # Use optimal thread count
-		bitrate="5000k" if RESOLUTION[1] >= 1080 else "2500k",  # Adaptive bitrate
-		ffmpeg_params=ffmpeg_params
-	)
+
+	cmd = build_ffmpeg_command(slide_defs, audio_durations, start_times, total_time, output_path, resolution, audio_rate)
+	# ffmpeg writes the MP4 itself; only the small -loglevel error stream
+	# comes back over a pipe. stdin is detached so ffmpeg never blocks
+	# waiting for interactive input
+	result = subprocess.run(cmd, capture_output=True, text=True, stdin=subprocess.DEVNULL)
+	if result.returncode != 0:
+		raise RuntimeError(f"ffmpeg failed (exit {result.returncode}): {result.stderr.strip()[-2000:]}")
 
 def main():
 	slide_defs = load_slides()
 	try:
-		optimization_info = "with performance optimization" if is_apple_silicon else ""
 		print(f"Generating video {'in PREVIEW mode' if PREVIEW else 'in FULL QUALITY'} "
-		      f"at {RESOLUTION[0]}x{RESOLUTION[1]} using {PROCESSES} threads {optimization_info}")
+		      f"at {RESOLUTION[0]}x{RESOLUTION[1]} using {PROCESSES} threads")
 		assemble_video(slide_defs)
 	except Exception as e:
 		sys.stderr.write(f"Error: {e}\n")
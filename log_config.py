@@ -49,6 +49,7 @@ class ColoredFormatter(logging.Formatter):
     MODULE_COLORS = {
         'ai_gen_video': BRIGHT_BLUE,
         'api_services': BRIGHT_CYAN,
+        'rate_limiter': BRIGHT_RED,
         'cache_manager': BRIGHT_GREEN,
         'video_generator': BRIGHT_MAGENTA,
         'main': BRIGHT_YELLOW
@@ -57,69 +58,71 @@ class ColoredFormatter(logging.Formatter):
     # Task-specific colors based on message content patterns
     TASK_PATTERNS = [
         # Data fetching and processing
-        (re.compile(r'fetch|headline|news', re.I), BLUE),
-        (re.compile(r'extract|article|content', re.I), CYAN),
-        (re.compile(r'(generat|process).*(summary|json)', re.I), GREEN),
-        
+        (r'fetch|headline|news', BLUE),
+        (r'extract|article|content', CYAN),
+        (r'(?:generat|process).*(?:summary|json)', GREEN),
+
         # Media generation
-        (re.compile(r'(generat|process).*(TTS|audio|speech|voice)', re.I), YELLOW),
-        (re.compile(r'(generat|process).*(image|img|picture|visual)', re.I), MAGENTA),
-        (re.compile(r'(generat|process|assembl).*(video|mp4|film)', re.I), BRIGHT_BLUE),
-        
+        (r'(?:generat|process).*(?:TTS|audio|speech|voice)', YELLOW),
+        (r'(?:generat|process).*(?:image|img|picture|visual)', MAGENTA),
+        (r'(?:generat|process|assembl).*(?:video|mp4|film)', BRIGHT_BLUE),
+
         # Performance and caching
-        (re.compile(r'cache|cached|saving', re.I), BRIGHT_GREEN),
-        (re.compile(r'load(ing)?|retriev(e|ing)|found', re.I), BRIGHT_CYAN),
-        
+        (r'cache|cached|saving', BRIGHT_GREEN),
+        (r'load(?:ing)?|retriev(?:e|ing)|found', BRIGHT_CYAN),
+
         # Progress indicators
-        (re.compile(r'start|begin|init', re.I), BRIGHT_BLUE),
-        (re.compile(r'complet|finish|done|success', re.I), BRIGHT_GREEN),
-        (re.compile(r'wait|pending|process(ing)?', re.I), BRIGHT_YELLOW),
-        
+        (r'start|begin|init', BRIGHT_BLUE),
+        (r'complet|finish|done|success', BRIGHT_GREEN),
+        (r'wait|pending|process(?:ing)?', BRIGHT_YELLOW),
+
         # Error handling
-        (re.compile(r'error|fail|exception|missing|invalid', re.I), RED),
-        (re.compile(r'warn(ing)?', re.I), YELLOW),
-        
+        (r'error|fail|exception|missing|invalid', RED),
+        (r'warn(?:ing)?', YELLOW),
+
         # API and external services
-        (re.compile(r'api|request|http|endpoint', re.I), BRIGHT_MAGENTA),
-        (re.compile(r'url|link', re.I), BLUE)
+        (r'api|request|http|endpoint', BRIGHT_MAGENTA),
+        (r'url|link', BLUE)
     ]
 
+    # All task patterns merged into one alternation so each record costs
+    # a single C-level scan instead of one search per pattern; the named
+    # group that matched maps back to its color
+    _TASK_UNION = re.compile(
+        '|'.join(f'(?P<t{i}>{pattern})' for i, (pattern, _) in enumerate(TASK_PATTERNS)),
+        re.I
+    )
+    _TASK_COLORS = {f't{i}': color for i, (_, color) in enumerate(TASK_PATTERNS)}
+
     def format(self, record):
-        # Save the original format
-        format_orig = self._style._fmt
-        original_message = record.getMessage()
+        # Build the line directly from colored components: no mutation of
+        # the record (other handlers see it too), no post-hoc substring
+        # search-and-splice over the formatted result
+        message = record.getMessage()
 
-        # Color based on log level
-        levelname = record.levelname
-        if levelname in self.LEVEL_COLORS:
-            colored_levelname = f"{self.LEVEL_COLORS[levelname]}{levelname}{RESET}"
-            record.levelname = colored_levelname
+        # One union search; the matching named group selects the color
+        match = self._TASK_UNION.search(message)
+        if match:
+            message = f"{self._TASK_COLORS[match.lastgroup]}{message}{RESET}"
 
-        # Color based on logger name/module
+        level_color = self.LEVEL_COLORS.get(record.levelname, '')
         module_color = self.MODULE_COLORS.get(record.name, MAGENTA)
-        record.name = f"{module_color}{record.name}{RESET}"
-        
-        # Format the record first to get all fields
-        result = super().format(record)
-        
-        # Apply color to timestamp
-        formatted_time = self.formatTime(record, self.datefmt)
-        colored_time = f"{BRIGHT_BLACK}{formatted_time}{RESET}"
-        result = result.replace(formatted_time, colored_time)
-        
-        # Apply task-specific message coloring
-        message_start = result.find(original_message)
-        if message_start != -1:
-            # Check if message matches any task patterns
-            for pattern, color in self.TASK_PATTERNS:
-                if pattern.search(original_message):
-                    colored_message = f"{color}{original_message}{RESET}"
-                    result = result[:message_start] + colored_message + result[message_start + len(original_message):]
-                    break
-        
-        # Restore the original format
-        self._style._fmt = format_orig
-        
+
+        result = (
+            f"{BRIGHT_BLACK}{self.formatTime(record, self.datefmt)}{RESET} - "
+            f"{module_color}{record.name}{RESET} - "
+            f"{level_color}{record.levelname}{RESET} - "
+            f"{message}"
+        )
+
+        # Append exception/stack text the way logging.Formatter does
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            result = f"{result}\n{record.exc_text}"
+        if record.stack_info:
+            result = f"{result}\n{self.formatStack(record.stack_info)}"
+
         return result
 
 def setup_colored_logging(level=logging.INFO):
@@ -6,12 +6,13 @@ from typing import List, Dict, Any
 from pydantic import BaseModel
 import uvicorn
 import os
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
 from pyngrok import ngrok
-import shutil
+import aiofiles
 from pathlib import Path
 import uuid
 import base64
-from io import BytesIO
 import logging
 
 # Import generator functions and logging config
@@ -39,6 +40,17 @@ OUTPUT_DIR = Path("outputs")
 UPLOAD_DIR.mkdir(exist_ok=True)
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# Static upload subdirectories, created once at import instead of per
+# slide inside the request loops
+IMAGE_UPLOAD_DIR = UPLOAD_DIR / "images"
+AUDIO_UPLOAD_DIR = UPLOAD_DIR / "audio"
+IMAGE_UPLOAD_DIR.mkdir(exist_ok=True)
+AUDIO_UPLOAD_DIR.mkdir(exist_ok=True)
+
+# Worker pool for video encoding: keeps the ffmpeg run off the asyncio
+# event loop so the server stays responsive to new requests mid-encode
+POOL = ProcessPoolExecutor(max_workers=max(1, os.cpu_count() // 2))
+
 class Base64Media(BaseModel):
     filename: str
     data: str  # base64 encoded data
@@ -62,6 +74,16 @@ async def generate_video(
     """
     return await process_video_generation(images, audios, preview_mode)
 
+# Decode base64 in slices that are multiples of 4 chars, so each slice
+# decodes standalone and peak memory stays at one slice, not the file
+B64_CHUNK = 4 * (1 << 20)
+
+async def write_base64_to_file(data, dest_path):
+    """Decode a base64 payload straight to disk in fixed-size slices"""
+    async with aiofiles.open(dest_path, "wb") as f:
+        for i in range(0, len(data), B64_CHUNK):
+            await f.write(base64.b64decode(data[i:i + B64_CHUNK]))
+
 @app.post("/generate-base64")
 async def generate_video_base64(request: GenerateVideoRequest):
     """
@@ -71,29 +93,37 @@ async def generate_video_base64(request: GenerateVideoRequest):
     - preview_mode: Whether to use preview resolution (faster) or full resolution
     """
     try:
-        # Create temporary file-like objects from base64 data
-        temp_images = []
-        temp_audios = []
-        
-        for img in request.images:
-            # Create UploadFile-like object with BytesIO
-            binary_data = base64.b64decode(img.data)
-            temp_img = UploadFile(file=img.filename)
-            temp_img.file = BytesIO(binary_data)
-            temp_images.append(temp_img)
-            
-        for audio in request.audios:
-            # Create UploadFile-like object with BytesIO
-            binary_data = base64.b64decode(audio.data)
-            temp_audio = UploadFile(file=audio.filename)
-            temp_audio.file = BytesIO(binary_data)
-            temp_audios.append(temp_audio)
-        
-        # Use the same processing function as the regular endpoint
-        return await process_video_generation(temp_images, temp_audios, request.preview_mode)
-        
+        # Validate input
+        if len(request.images) != len(request.audios):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Number of images ({len(request.images)}) must match number of audios ({len(request.audios)})"
+            )
+
+        # Generate a unique ID for this job
+        job_id = str(uuid.uuid4())
+
+        # Decode each payload directly into its upload file - no BytesIO
+        # buffering or fake UploadFile objects in between
+        slide_defs = []
+        for i, (img, audio) in enumerate(zip(request.images, request.audios)):
+            image_path = IMAGE_UPLOAD_DIR / f"{job_id}_{i}_{img.filename}"
+            await write_base64_to_file(img.data, image_path)
+
+            audio_path = AUDIO_UPLOAD_DIR / f"{job_id}_{i}_{audio.filename}"
+            await write_base64_to_file(audio.data, audio_path)
+
+            slide_defs.append({
+                "image": str(image_path),
+                "audio": str(audio_path)
+            })
+
+        # Encode and respond the same way as the multipart endpoint
+        return await run_encode_job(job_id, slide_defs, request.preview_mode)
+
     except Exception as e:
         logger.error(f"Error processing base64 data: {str(e)}")
+        cleanup_slide_files(locals().get('slide_defs'))
         return JSONResponse(
             status_code=500,
             content={
@@ -102,6 +132,37 @@ async def generate_video_base64(request: GenerateVideoRequest):
             }
         )
 
+async def save_upload(upload, dest_path):
+    """
+    Persist an UploadFile to dest_path.
+
+    Large uploads that Starlette has already spooled to disk are copied
+    kernel-side with os.sendfile (page cache to page cache, no userspace
+    bounce buffer); in-memory uploads stream through aiofiles in 1 MiB
+    chunks without blocking the event loop.
+    """
+    # Reset file pointer if it's been read before
+    await upload.seek(0)
+
+    src = upload.file
+    if hasattr(os, "sendfile") and getattr(src, "_rolled", False):
+        def copy_kernel_side():
+            src_fd = src.fileno()
+            size = os.fstat(src_fd).st_size
+            with open(dest_path, "wb") as dst:
+                offset = 0
+                while offset < size:
+                    sent = os.sendfile(dst.fileno(), src_fd, offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+
+        await asyncio.get_running_loop().run_in_executor(None, copy_kernel_side)
+    else:
+        async with aiofiles.open(dest_path, "wb") as buffer:
+            while chunk := await upload.read(1 << 20):
+                await buffer.write(chunk)
+
 async def process_video_generation(images, audios, preview_mode):
     """
     Generate a video from the provided images and audio files and return the video file directly.
@@ -119,35 +180,17 @@ async def process_video_generation(images, audios, preview_mode):
         
         # Generate a unique ID for this job
         job_id = str(uuid.uuid4())
-        
-        # Create output filename and path
-        filename = f"{job_id}.mp4"
-        output_path = OUTPUT_DIR / filename
-        
+
         # Save uploaded files
         slide_defs = []
         for i, (image, audio) in enumerate(zip(images, audios)):
             # Save image
-            image_subdir = UPLOAD_DIR / "images"
-            image_subdir.mkdir(exist_ok=True)
-            image_filename = f"{job_id}_{i}_{image.filename}"
-            image_path = image_subdir / image_filename
-            
-            # Reset file pointer if it's been read before
-            image.file.seek(0)
-            with open(image_path, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
-            
+            image_path = IMAGE_UPLOAD_DIR / f"{job_id}_{i}_{image.filename}"
+            await save_upload(image, image_path)
+
             # Save audio
-            audio_subdir = UPLOAD_DIR / "audio"
-            audio_subdir.mkdir(exist_ok=True)
-            audio_filename = f"{job_id}_{i}_{audio.filename}"
-            audio_path = audio_subdir / audio_filename
-            
-            # Reset file pointer if it's been read before
-            audio.file.seek(0)
-            with open(audio_path, "wb") as buffer:
-                shutil.copyfileobj(audio.file, buffer)
+            audio_path = AUDIO_UPLOAD_DIR / f"{job_id}_{i}_{audio.filename}"
+            await save_upload(audio, audio_path)
             
             # Add to slide definitions
             slide_defs.append({
@@ -155,65 +198,12 @@ async def process_video_generation(images, audios, preview_mode):
                 "audio": str(audio_path)
             })
         
-        # Set resolution based on preview mode
-        resolution = PREVIEW_RESOLUTION if preview_mode else FULL_RESOLUTION
-        
-        # Keep track of temp files to clean up later
-        temp_files = []
-        for slide_def in slide_defs:
-            temp_files.append(slide_def["image"])
-            temp_files.append(slide_def["audio"])
-        
-        # Modify generator settings for this job
-        import generator
-        original_output = generator.OUTPUT_FILENAME
-        original_resolution = generator.RESOLUTION
-        
-        try:
-            # Update generator settings
-            generator.OUTPUT_FILENAME = str(output_path)
-            generator.RESOLUTION = resolution
-            
-            # Generate the video synchronously
-            logger.info(f"Starting video generation for job {job_id}")
-            assemble_video(slide_defs)
-            logger.info(f"Video generation completed for job {job_id}")
-            
-        finally:
-            # Restore original settings
-            generator.OUTPUT_FILENAME = original_output
-            generator.RESOLUTION = original_resolution
-            
-        # Clean up temporary files after successful generation
-        for temp_file in temp_files:
-            try:
-                os.remove(temp_file)
-                logger.debug(f"Removed temporary file: {temp_file}")
-            except Exception as e:
-                logger.warning(f"Failed to remove temporary file {temp_file}: {e}")
-        
-        # Return the video file directly
-        return FileResponse(
-            path=str(output_path),
-            filename=filename,
-            media_type="video/mp4"
-        )
-        
+        # Encode and respond
+        return await run_encode_job(job_id, slide_defs, preview_mode)
+
     except Exception as e:
         logger.error(f"Error generating video: {str(e)}")
-        
-        # Clean up temporary files in case of error, but only if job_id is defined
-        try:
-            if 'job_id' in locals() and 'slide_defs' in locals(): 
-                # If we've already created the slide_defs, remove those specific files
-                for slide_def in slide_defs:
-                    if os.path.exists(slide_def["image"]):
-                        os.remove(slide_def["image"])
-                    if os.path.exists(slide_def["audio"]):
-                        os.remove(slide_def["audio"])
-        except Exception as cleanup_error:
-            logger.warning(f"Error during cleanup: {cleanup_error}")
-            
+        cleanup_slide_files(locals().get('slide_defs'))
         return JSONResponse(
             status_code=500,
             content={
@@ -222,6 +212,47 @@ async def process_video_generation(images, audios, preview_mode):
             }
         )
 
+async def run_encode_job(job_id, slide_defs, preview_mode):
+    """
+    Encode the prepared slides in a worker process and return the video
+    file directly. Removes the staged upload files afterwards.
+    """
+    # Create output filename and path
+    filename = f"{job_id}.mp4"
+    output_path = OUTPUT_DIR / filename
+
+    # Set resolution based on preview mode
+    resolution = PREVIEW_RESOLUTION if preview_mode else FULL_RESOLUTION
+
+    # Generate the video in a worker process, passing the per-job
+    # settings instead of mutating generator module globals
+    logger.info(f"Starting video generation for job {job_id}")
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(POOL, assemble_video, slide_defs, str(output_path), resolution)
+    logger.info(f"Video generation completed for job {job_id}")
+
+    # Clean up temporary files after successful generation
+    cleanup_slide_files(slide_defs)
+
+    # Return the video file directly
+    return FileResponse(
+        path=str(output_path),
+        filename=filename,
+        media_type="video/mp4"
+    )
+
+def cleanup_slide_files(slide_defs):
+    """Remove the staged image/audio files for a job, ignoring misses"""
+    for slide_def in slide_defs or []:
+        for temp_file in (slide_def["image"], slide_def["audio"]):
+            try:
+                os.remove(temp_file)
+                logger.debug(f"Removed temporary file: {temp_file}")
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Failed to remove temporary file {temp_file}: {e}")
+
 if __name__ == "__main__":
     # Open a ngrok tunnel to the HTTP server
     port = 8000
@@ -230,4 +261,14 @@ if __name__ == "__main__":
     print("To access your API directly: " + public_url + "/generate-base64")
     
     # Start the FastAPI application
-    uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
+    if os.getenv("DEV"):
+        # Auto-reload for development (forces a single worker)
+        uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
+    else:
+        # Multi-process workers on the libuv event loop with the C http
+        # parser - the default asyncio loop is ~2x slower on I/O
+        uvicorn.run(
+            "main:app", host="0.0.0.0", port=port,
+            workers=max(2, os.cpu_count()),
+            loop="uvloop", http="httptools"
+        )
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+import time
+import asyncio
+import logging
+
+# Use logger from centralized config
+from log_config import setup_colored_logging
+logger = logging.getLogger('rate_limiter')
+
+class TokenBucket:
+    """
+    Asyncio token-bucket rate limiter for a single API host.
+
+    Requests dispatch immediately while the bucket has budget and only
+    block (await) when the provider cap would be exceeded, unlike a fixed
+    sleep between submissions which serializes dispatch even when the
+    provider has spare capacity.
+    """
+    def __init__(self, rate, per=60.0, name="default"):
+        self.rate = float(rate)      # tokens added per `per` seconds
+        self.per = float(per)
+        self.name = name
+        self.capacity = float(rate)  # burst size equals the refill rate
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Take one token, sleeping until the bucket refills if empty"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity,
+                                  self.tokens + (now - self.updated) * (self.rate / self.per))
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait = (1 - self.tokens) * (self.per / self.rate)
+                logger.debug(f"Rate limit '{self.name}' exhausted, waiting {wait:.2f}s")
+                await asyncio.sleep(wait)
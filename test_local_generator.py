@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import os
+import re
 import logging
 import base64
 from pathlib import Path
@@ -12,6 +13,27 @@ from log_config import setup_colored_logging
 setup_colored_logging(level=logging.INFO)
 logger = logging.getLogger('test')
 
+# Ensure outputs directory exists (once per process, not per call)
+OUTPUT_DIR = Path("outputs")
+OUTPUT_DIR.mkdir(exist_ok=True)
+
+# Compiled once: strips everything but ASCII letters from headlines
+CLEAN_HEADLINE_RE = re.compile(r'[^a-zA-Z]')
+
+def index_outputs(outputs_dir="outputs"):
+    """One scandir pass over outputs/ into a set of headline keys, parsed
+    with string splits (names are timestamp_HHMMSS_Headline.mp4) instead
+    of per-name regex work"""
+    keys = set()
+    with os.scandir(outputs_dir) as it:
+        for entry in it:
+            name = entry.name
+            if name.endswith(".mp4") and entry.is_file(follow_symlinks=False):
+                parts = name[:-4].split("_", 2)
+                if len(parts) == 3:
+                    keys.add(parts[2])
+    return keys
+
 def main():
     logger.info("Testing local video generator with fixed ffmpeg configuration")
     
@@ -47,14 +69,10 @@ def main():
     # Test the video filename and skipping feature
     logger.info(f"Checking if a video already exists for headline: '{headline}'")
     
-    import re
-    clean_headline = re.sub(r'[^a-zA-Z]', '', headline)[:20]
-    outputs_dir = Path("outputs")
-    outputs_dir.mkdir(exist_ok=True)
-    
-    existing_videos = list(outputs_dir.glob(f"*_{clean_headline}.mp4"))
-    if existing_videos:
-        logger.info(f"Found existing video: {existing_videos[0]}")
+    clean_headline = CLEAN_HEADLINE_RE.sub('', headline)[:20]
+
+    if clean_headline in index_outputs():
+        logger.info(f"Found existing video for: {clean_headline}")
         logger.info("The system would skip generation for this headline")
     else:
         logger.info("No existing video found for this headline")
@@ -20,8 +20,29 @@ logger = logging.getLogger('test')
 cache_manager = CacheManager(cache_dir="./cache")
 video_generator = VideoGenerator()
 
-# Sample mock headlines
-MOCK_HEADLINES = [
+# Ensure outputs directory exists (once per process, not per call)
+OUTPUT_DIR = Path("outputs")
+OUTPUT_DIR.mkdir(exist_ok=True)
+
+# Compiled once: strips everything but ASCII letters from headlines
+CLEAN_HEADLINE_RE = re.compile(r'[^a-zA-Z]')
+
+def index_outputs(outputs_dir="outputs"):
+    """One scandir pass over outputs/ into a set of headline keys, parsed
+    with string splits (names are timestamp_HHMMSS_Headline.mp4) instead
+    of per-name regex work"""
+    keys = set()
+    with os.scandir(outputs_dir) as it:
+        for entry in it:
+            name = entry.name
+            if name.endswith(".mp4") and entry.is_file(follow_symlinks=False):
+                parts = name[:-4].split("_", 2)
+                if len(parts) == 3:
+                    keys.add(parts[2])
+    return keys
+
+# Sample mock headlines (immutable fixture data)
+MOCK_HEADLINES = (
     {"title": "Italia vince la Coppa UEFA 2025", "link": "https://example.com/sport/1"},
     {"title": "Nuova tecnologia per batterie ecologiche", "link": "https://example.com/tech/1"},
     {"title": "Festival di Sanremo 2025 annuncia i partecipanti", "link": "https://example.com/culture/1"},
@@ -30,54 +51,47 @@ MOCK_HEADLINES = [
     {"title": "Comunicato stampa del Consiglio dei Ministri n. 128", "link": "https://example.com/politics/1"},
     {"title": "Bartolomeo incontra Leone XIV a Roma", "link": "https://example.com/religion/1"},
     {"title": "Mattarella a Palazzo Ducale inaugura mostra", "link": "https://example.com/culture/2"}
-]
+)
+
+# Cleaned headline keys are pure functions of the fixture, so compute
+# them once at load instead of re-running the regex per lookup
+CANDIDATES = tuple(
+    (article, CLEAN_HEADLINE_RE.sub('', article.get('title', 'No title'))[:20])
+    for article in MOCK_HEADLINES
+)
+
+def find_first_unprocessed(candidates):
+    """One batched pass over the candidates: a single directory scan into
+    a set, then an O(1) membership probe per precomputed key"""
+    rendered = index_outputs(OUTPUT_DIR)
+    return next(
+        ((article, key) for article, key in candidates if key not in rendered),
+        None
+    )
 
 def main():
     logger.info("Starting test workflow to find and process first unprocessed headline")
-    
-    # Ensure outputs directory exists
-    outputs_dir = Path("outputs")
-    outputs_dir.mkdir(exist_ok=True)
-    
-    # Track if we found any new article to process
-    processed_article = False
-    
-    # Check each headline
-    for i, article in enumerate(MOCK_HEADLINES):
-        headline_text = article.get('title', 'No title')
-        logger.info(f"Checking article {i+1}/{len(MOCK_HEADLINES)}: {headline_text}")
-        
-        # Clean headline (letters only, truncated to 20 chars)
-        clean_headline = re.sub(r'[^a-zA-Z]', '', headline_text)[:20]
-        
-        # Check for existing videos with this headline
-        existing_videos = list(outputs_dir.glob(f"*_{clean_headline}.mp4"))
-        if existing_videos:
-            existing_video = existing_videos[0]
-            logger.info(f"Video already exists for this headline: {existing_video}")
-            continue  # Check next headline
-        
-        # Found a headline without existing video, process it
-        logger.info(f"Selected article for processing: {headline_text}")
-        
-        # Create dummy video file to simulate processing
-        timestamp = time.strftime("%Y%m%d_%H%M%S")
-        output_filename = f"{timestamp}_{clean_headline}.mp4"
-        output_path = outputs_dir / output_filename
-        
-        # Create empty dummy file (would be a real video in production)
-        with open(output_path, "wb") as f:
-            f.write(b"Dummy video content")
-        
-        logger.info(f"Created dummy video: {output_path}")
-        processed_article = True
-        break  # Stop after first unprocessed article
-    
+
+    found = find_first_unprocessed(CANDIDATES)
+
     # If we checked all headlines and found none to process
-    if not processed_article:
+    if found is None:
         logger.info("All articles already have videos generated - nothing new to process")
         return None
-    
+
+    # Found a headline without existing video, process it
+    article, clean_headline = found
+    headline_text = article.get('title', 'No title')
+    logger.info("Selected article for processing: %s", headline_text)
+
+    # Create dummy video file to simulate processing
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    output_path = OUTPUT_DIR / f"{timestamp}_{clean_headline}.mp4"
+
+    # Create empty dummy file (would be a real video in production)
+    output_path.write_bytes(b"Dummy video content")
+
+    logger.info("Created dummy video: %s", output_path)
     logger.info("Successfully processed the first article without an existing video")
     return True
 
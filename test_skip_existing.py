@@ -11,46 +11,71 @@ from log_config import setup_colored_logging
 setup_colored_logging(level=logging.INFO)
 logger = logging.getLogger('test_skip')
 
+# Ensure outputs directory exists (once per process, not per call)
+OUTPUT_DIR = Path("outputs")
+OUTPUT_DIR.mkdir(exist_ok=True)
+
+# Compiled once: strips everything but ASCII letters from headlines
+CLEAN_HEADLINE_RE = re.compile(r'[^a-zA-Z]')
+
+def index_outputs(outputs_dir="outputs"):
+    """One scandir pass over outputs/ into a set of headline keys, parsed
+    with string splits (names are timestamp_HHMMSS_Headline.mp4) instead
+    of per-name regex work"""
+    keys = set()
+    with os.scandir(outputs_dir) as it:
+        for entry in it:
+            name = entry.name
+            if name.endswith(".mp4") and entry.is_file(follow_symlinks=False):
+                parts = name[:-4].split("_", 2)
+                if len(parts) == 3:
+                    keys.add(parts[2])
+    return keys
+
+# Module-level index, built lazily on first probe; writers add new keys
+# to it rather than forcing a re-scan
+_rendered = None
+
+def _rendered_index():
+    global _rendered
+    if _rendered is None:
+        _rendered = index_outputs()
+    return _rendered
+
+def video_exists_for(headline):
+    """O(1) probe of the cached outputs index"""
+    return CLEAN_HEADLINE_RE.sub('', headline)[:20] in _rendered_index()
+
 # Create a dummy file to simulate an existing video
 def create_dummy_video(headline):
     # Clean headline (letters only, truncated to 20 chars)
-    clean_headline = re.sub(r'[^a-zA-Z]', '', headline)[:20]
+    clean_headline = CLEAN_HEADLINE_RE.sub('', headline)[:20]
     
     # Create timestamp (using a fixed one for testing)
     timestamp = "20250520_010000"
     
     # Create filename
     filename = f"{timestamp}_{clean_headline}.mp4"
-    
-    # Ensure outputs directory exists
-    outputs_dir = Path("outputs")
-    outputs_dir.mkdir(exist_ok=True)
-    
+
     # Full path
-    output_path = outputs_dir / filename
-    
-    # Create empty file
-    with open(output_path, "wb") as f:
-        f.write(b"Dummy video content")
+    output_path = OUTPUT_DIR / filename
     
+    # Create dummy file in one call (open/write/close in C, no handle
+    # juggling in Python)
+    output_path.write_bytes(b"Dummy video content")
+
+    # Keep the cached index coherent instead of re-scanning
+    if _rendered is not None:
+        _rendered.add(clean_headline)
+
     return output_path
 
 def check_if_video_exists(headline):
-    # Clean headline (letters only, truncated to 20 chars)
-    clean_headline = re.sub(r'[^a-zA-Z]', '', headline)[:20]
-    
-    # Ensure outputs directory exists
-    outputs_dir = Path("outputs")
-    outputs_dir.mkdir(exist_ok=True)
-    
-    # Check for existing videos with this headline
-    existing_videos = list(outputs_dir.glob(f"*_{clean_headline}.mp4"))
-    
-    if existing_videos:
-        logger.info(f"Video already exists for headline '{headline}': {existing_videos[0]}")
+    if video_exists_for(headline):
+        logger.info("Video already exists for headline '%s'", headline)
         return True
     else:
-        logger.info(f"No video found for headline '{headline}', would generate new one")
+        logger.info("No video found for headline '%s', would generate new one", headline)
         return False
 
 def main():
@@ -64,7 +89,7 @@ def main():
     dummy_path = create_dummy_video(test_headlines[0])
     logger.info(f"Created dummy video at {dummy_path}")
     
-    # Check both headlines
+    # Check both headlines against the cached index
     for headline in test_headlines:
         logger.info(f"\nTesting headline: '{headline}'")
         exists = check_if_video_exists(headline)
@@ -11,6 +11,10 @@ from log_config import setup_colored_logging
 setup_colored_logging(level=logging.INFO)
 logger = logging.getLogger('test')
 
+# Placeholder asset directory, created once at import
+TEST_ASSET_DIR = Path(__file__).parent / "test_assets"
+TEST_ASSET_DIR.mkdir(exist_ok=True)
+
 # Create mock data for a video
 def main():
     logger.info("Starting test video generation with filename formatting")
@@ -23,19 +27,14 @@ def main():
     
     # Create a basic slide structure with dummy data
     # This would normally come from API calls, but we're mocking it for testing
-    test_img_path = Path(__file__).parent / "test_assets"
-    test_img_path.mkdir(exist_ok=True)
-    
     # Create a text file as a placeholder if no images exist yet
-    test_img = test_img_path / "test_image.txt"
+    test_img = TEST_ASSET_DIR / "test_image.txt"
     if not test_img.exists():
-        with open(test_img, "w") as f:
-            f.write("Test image placeholder")
-    
-    test_audio = test_img_path / "test_audio.txt"
+        test_img.write_text("Test image placeholder")
+
+    test_audio = TEST_ASSET_DIR / "test_audio.txt"
     if not test_audio.exists():
-        with open(test_audio, "w") as f:
-            f.write("Test audio placeholder")
+        test_audio.write_text("Test audio placeholder")
     
     # Mock data that would normally come from image/audio generation
     mock_results = {
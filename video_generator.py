@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
 import os
-import base64
 import logging
-import json
+import shutil
 import tempfile
 import re
-import datetime
+import time
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 # Import the local generator module
 from generator import assemble_video, PREVIEW_RESOLUTION, FULL_RESOLUTION
@@ -19,6 +19,33 @@ logger = logging.getLogger('video_generator')
 OUTPUT_DIR = Path("outputs")
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# Compiled once: strips everything but ASCII letters from headlines
+CLEAN_HEADLINE_RE = re.compile(r'[^a-zA-Z]')
+
+# Stage ephemeral slide assets on tmpfs when the host has one
+TEMP_ASSET_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+def _write_asset(path, payload):
+    """Stage one asset into the temp dir.
+
+    Contract: payloads are either a Path to a cache file already on disk
+    or raw bytes - base64 decoding happens once at the API boundary, not
+    here. Path payloads are hardlinked (O(1) metadata, zero data
+    movement), falling back to a plain copy when the temp dir sits on
+    another filesystem.
+    """
+    assert isinstance(payload, (Path, bytes, bytearray, memoryview)), \
+        f"asset payload must be a Path or bytes, got {type(payload).__name__}"
+
+    if isinstance(payload, Path):
+        try:
+            os.link(payload, path)
+        except OSError:  # cross-device link, e.g. cache on disk, tmpfs staging
+            shutil.copyfile(payload, path)
+        return
+
+    Path(path).write_bytes(payload)
+
 class VideoGenerator:
     def __init__(self, video_gen_url=None):
         # video_gen_url parameter is kept for backward compatibility but not used
@@ -36,18 +63,19 @@ class VideoGenerator:
             logger.error("No valid results to generate video. All API calls failed.")
             return False
             
-        logger.info(f"Proceeding with {len(valid_results)} valid slides out of {len(all_results)} total")
+        logger.info("Proceeding with %d valid slides out of %d total", len(valid_results), len(all_results))
         
         # Create output filename with timestamp and headline if provided
         if output_filename is None:
-            # Get current timestamp
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            # Get current timestamp (time.strftime skips the intermediate
+            # datetime object)
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
             
             # Process headline if available
             headline_part = ""
             if headline:
                 # Keep only a-z and A-Z characters from headline
-                clean_headline = re.sub(r'[^a-zA-Z]', '', headline)
+                clean_headline = CLEAN_HEADLINE_RE.sub('', headline)
                 # Truncate to 20 characters
                 headline_part = clean_headline[:20]
             
@@ -56,68 +84,48 @@ class VideoGenerator:
         
         # Ensure output is in the outputs directory
         output_path = OUTPUT_DIR / output_filename
-        logger.info(f"Video will be saved as {output_path}")
+        logger.info("Video will be saved as %s", output_path)
         
-        # Create temporary directory for assets
-        temp_dir = tempfile.mkdtemp()
         try:
-            # Prepare slide definitions
-            slide_defs = []
-            
-            # Save images and audio to disk
-            for i in sorted(valid_results.keys()):
-                # Save image
-                image_path = os.path.join(temp_dir, f"image{i+1}.jpg")
-                with open(image_path, "wb") as f:
-                    # Base64 decode if needed
-                    if isinstance(valid_results[i]["image"], str):
-                        f.write(base64.b64decode(valid_results[i]["image"]))
-                    else:
-                        f.write(valid_results[i]["image"])
-                
-                # Save audio
-                audio_path = os.path.join(temp_dir, f"audio{i+1}.mp3")
-                with open(audio_path, "wb") as f:
-                    f.write(valid_results[i]["audio"])
-                
-                # Add to slide definitions
-                slide_defs.append({
-                    "image": image_path,
-                    "audio": audio_path
-                })
-            
-            logger.info(f"Prepared {len(slide_defs)} slides for video generation")
-            
-            # Temporarily modify generator settings
-            import generator
-            original_output = generator.OUTPUT_FILENAME
-            original_resolution = generator.RESOLUTION
-            
-            try:
-                # Set new generator settings
-                generator.OUTPUT_FILENAME = str(output_path)
-                generator.RESOLUTION = PREVIEW_RESOLUTION if preview_mode else FULL_RESOLUTION
-                
-                # Call the generator directly
+            # Stage assets on tmpfs when available: they are written once
+            # and read straight back by ffmpeg, so landing them in RAM
+            # skips the disk round-trip. TemporaryDirectory cleans up on
+            # exit, replacing the manual rmtree.
+            with tempfile.TemporaryDirectory(dir=TEMP_ASSET_DIR, prefix="vidgen_") as temp_dir:
+                # Prepare slide definitions and collect the asset writes,
+                # iterating one pre-sorted list; filenames use the dense
+                # enumeration index so sparse original keys don't matter
+                ordered = sorted(valid_results.items())
+                slide_defs = []
+                writes = []
+                for new_idx, (_, result) in enumerate(ordered, start=1):
+                    image_path = f"{temp_dir}/image{new_idx}.jpg"
+                    writes.append((image_path, result["image"]))
+
+                    audio_path = f"{temp_dir}/audio{new_idx}.mp3"
+                    writes.append((audio_path, result["audio"]))
+
+                    # Add to slide definitions
+                    slide_defs.append({
+                        "image": image_path,
+                        "audio": audio_path
+                    })
+
+                # The writes are independent I/O that releases the GIL, so
+                # stage them concurrently instead of one after another
+                with ThreadPoolExecutor(max_workers=min(8, len(writes))) as executor:
+                    list(executor.map(lambda w: _write_asset(*w), writes))
+
+                logger.info("Prepared %d slides for video generation", len(slide_defs))
+
+                # Call the generator directly, passing the per-job settings
+                # instead of mutating generator module globals
+                resolution = PREVIEW_RESOLUTION if preview_mode else FULL_RESOLUTION
                 logger.info("Assembling video with local generator")
-                assemble_video(slide_defs)
-                logger.info(f"Video saved as {output_path}")
+                assemble_video(slide_defs, output_path=str(output_path), resolution=resolution)
+                logger.info("Video saved as %s", output_path)
                 return str(output_path)  # Return the full path to the video file
-                
-            finally:
-                # Restore original settings
-                generator.OUTPUT_FILENAME = original_output
-                generator.RESOLUTION = original_resolution
-                
+
         except Exception as e:
-            logger.error(f"Failed to generate video: {e}")
+            logger.error("Failed to generate video: %s", e)
             return False
-            
-        finally:
-            # Clean up temporary files
-            import shutil
-            try:
-                shutil.rmtree(temp_dir)
-                logger.debug(f"Cleaned up temporary directory: {temp_dir}")
-            except Exception as e:
-                logger.warning(f"Failed to clean up temporary directory: {e}")